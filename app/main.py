@@ -1,12 +1,18 @@
 import os
 import asyncio
 import json
+import random
 import time
 import logging
-from typing import Optional
+import logging.handlers
+import queue
+from typing import Dict, Optional
 
 import asyncpg
-from fastapi import FastAPI, HTTPException, Request
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from pythonjsonlogger import jsonlogger
 
@@ -14,10 +20,59 @@ DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://user:password@db:5432/inv
 PESSIMISTIC_LOCK_TIMEOUT_MS = int(os.getenv("PESSIMISTIC_LOCK_TIMEOUT_MS", "2000"))
 OPTIMISTIC_MAX_RETRIES = int(os.getenv("OPTIMISTIC_MAX_RETRIES", "3"))
 OPTIMISTIC_BASE_BACKOFF_MS = int(os.getenv("OPTIMISTIC_BASE_BACKOFF_MS", "50"))
+OPTIMISTIC_MAX_BACKOFF_MS = int(os.getenv("OPTIMISTIC_MAX_BACKOFF_MS", "1000"))
+# opt-in: optimistic orders for a product whose recent conflict rate exceeds
+# this are served by the pessimistic path instead. The rate never exceeds 1,
+# so the default of 1 keeps every optimistic order optimistic
+OPTIMISTIC_HOT_ROW_THRESHOLD = float(os.getenv("OPTIMISTIC_HOT_ROW_THRESHOLD", "1.0"))
+CONFLICT_RATE_ALPHA = 0.2
+CONFLICT_RATE_HALF_LIFE_S = 1.0
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
-
-app = FastAPI()
+# DB_POOL_MAX must stay below Postgres max_connections minus superuser/maintenance overhead
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "10"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "50"))
+PRODUCT_CACHE_TTL_SECONDS = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "1.0"))
+
+# SQL is kept at module level so every call passes the same string object to
+# asyncpg's statement cache and all queries can be reviewed in one place
+SQL_GET_PRODUCT = "SELECT id, name, stock, version FROM products WHERE id = $1"
+SQL_GET_ORDER = "SELECT id, product_id, quantity_ordered, user_id, status, created_at FROM orders WHERE id = $1"
+SQL_RESET_PRODUCTS = "UPDATE products SET stock = CASE WHEN name = 'Super Widget' THEN 100 WHEN name = 'Mega Gadget' THEN 50 ELSE stock END, version = 1"
+SQL_ORDER_STATUS_COUNTS = "SELECT status, SUM(n) AS n FROM order_status_counts GROUP BY status"
+# retries-exhausted audit row; like the other failure paths it relaxes its own
+# commit in the same statement so it doesn't wait on the WAL flush
+SQL_INSERT_CONFLICT_ORDER = (
+    "WITH ins AS (INSERT INTO orders (product_id, quantity_ordered, user_id, status) "
+    "VALUES ($1, $2, $3, 'FAILED_CONFLICT') RETURNING id) "
+    "SELECT set_config('synchronous_commit', 'off', true) FROM ins"
+)
+# lock, stock check, decrement and order insert all run server-side in the
+# place_order() function (seeds/init.sql), so a pessimistic order is one round-trip
+SQL_PLACE_ORDER = "SELECT order_id, order_status, available FROM place_order($1, $2, $3, $4)"
+# read-and-compare-and-swap in one round-trip: the CTEs share a snapshot, and
+# if a concurrent writer bumps the version the UPDATE re-checks against the new
+# row and matches nothing. Exactly one of ok/failed inserts an order (neither
+# does on a version conflict); a failed order is an audit row, so its commit
+# skips waiting on the WAL flush
+SQL_OPTIMISTIC_ORDER = (
+    "WITH prod AS (SELECT id, stock, version FROM products WHERE id = $2), "
+    "upd AS (UPDATE products p SET stock = p.stock - $1, version = p.version + 1 "
+    "FROM prod WHERE p.id = prod.id AND p.version = prod.version AND p.stock >= $1 "
+    "RETURNING p.id), "
+    "ok AS (INSERT INTO orders (product_id, quantity_ordered, user_id, status) "
+    "SELECT id, $1::int, $3::varchar, 'SUCCESS' FROM upd RETURNING id, status), "
+    "failed AS (INSERT INTO orders (product_id, quantity_ordered, user_id, status) "
+    "SELECT id, $1::int, $3::varchar, 'FAILED_OUT_OF_STOCK' FROM prod WHERE stock < $1 RETURNING id) "
+    "SELECT prod.stock, (SELECT id FROM ok) AS order_id, (SELECT status FROM ok) AS order_status, "
+    "(SELECT id FROM failed) AS failed_order_id, "
+    "(SELECT set_config('synchronous_commit', 'off', true) FROM failed) AS relaxed FROM prod"
+)
+
+app = FastAPI(default_response_class=ORJSONResponse)
 db_pool: Optional[asyncpg.pool.Pool] = None
+# short-lived per-process cache of encoded GET /api/products/{id} bodies; entries are dropped
+# when an order changes the product's stock
+_product_cache = TTLCache(maxsize=1024, ttl=PRODUCT_CACHE_TTL_SECONDS)
 
 
 # helpers for timing queries
@@ -25,57 +80,165 @@ async def timed_fetchrow(conn, query, *args):
     start = time.time()
     row = await conn.fetchrow(query, *args)
     duration_ms = int((time.time() - start) * 1000)
-    logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
     return row
 
-async def timed_fetchval(conn, query, *args):
+async def timed_fetch(conn, query, *args):
     start = time.time()
-    val = await conn.fetchval(query, *args)
+    rows = await conn.fetch(query, *args)
     duration_ms = int((time.time() - start) * 1000)
-    logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
-    return val
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
+    return rows
 
 async def timed_execute(conn, query, *args):
     start = time.time()
     result = await conn.execute(query, *args)
     duration_ms = int((time.time() - start) * 1000)
-    logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("db_query", extra={"query": query, "duration_ms": duration_ms})
     return result
 
 
-# Configure structured JSON logging
+class OrjsonFormatter(jsonlogger.JsonFormatter):
+    """JsonFormatter that serializes with orjson instead of stdlib json."""
+
+    _fallback = jsonlogger.JsonEncoder().default
+
+    def jsonify_log_record(self, log_record):
+        return orjson.dumps(log_record, default=self._fallback).decode()
+
+
+class PassthroughQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is so formatting happens on the listener thread."""
+
+    def prepare(self, record):
+        return record
+
+
+# Configure structured JSON logging; the event loop only enqueues records and a
+# background QueueListener thread does the formatting and stream writes. The
+# listener runs for the app's lifespan (see startup/shutdown); records logged
+# outside it wait in the queue until the next start
 logger = logging.getLogger("inventory")
+log_queue = queue.SimpleQueue()
+log_listener: Optional[logging.handlers.QueueListener] = None
+_log_listener_running = False
 if not logger.handlers:
     logHandler = logging.StreamHandler()
-    formatter = jsonlogger.JsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s")
+    formatter = OrjsonFormatter("%(asctime)s %(levelname)s %(name)s %(message)s")
     logHandler.setFormatter(formatter)
-    logger.addHandler(logHandler)
+    logger.addHandler(PassthroughQueueHandler(log_queue))
+    log_listener = logging.handlers.QueueListener(log_queue, logHandler)
 logger.setLevel(getattr(logging, LOG_LEVEL.upper(), logging.INFO))
 
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start = time.time()
-    try:
-        response = await call_next(request)
-        status_code = response.status_code
-    except Exception as exc:  # pragma: no cover - bubble up
+def start_log_listener():
+    global _log_listener_running
+    if log_listener and not _log_listener_running:
+        log_listener.start()
+        _log_listener_running = True
+
+
+def stop_log_listener():
+    # flushes queued records; safe to call when already stopped
+    global _log_listener_running
+    if log_listener and _log_listener_running:
+        _log_listener_running = False
+        log_listener.stop()
+
+
+class RequestLoggingMiddleware:
+    """Pure ASGI request logger; avoids BaseHTTPMiddleware's per-request overhead."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
         status_code = 500
-        logger.exception("request_error", extra={
-            "method": request.method,
-            "path": request.url.path,
-        })
-        raise
-    finally:
-        duration_ms = int((time.time() - start) * 1000)
-        logger.info("http_request", extra={
-            "method": request.method,
-            "path": request.url.path,
-            "status_code": status_code,
-            "duration_ms": duration_ms,
-            "client": request.client.host if request.client else None,
-        })
-    return response
+        raw_path = scope.get("raw_path")
+        client = scope.get("client")
+        # built once per request; status/duration are filled in on the way out
+        extra = {
+            "method": scope["method"],
+            "path": raw_path.decode("latin-1") if raw_path else scope["path"],
+            "client": client[0] if client else None,
+        }
+
+        logged = False
+
+        def log_request(end):
+            extra["status_code"] = status_code
+            extra["duration_ms"] = (end - start) // 1_000_000
+            logger.info("http_request", extra=extra)
+
+        async def send_wrapper(message):
+            nonlocal status_code, logged
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # response is fully sent; emit the log on a later loop iteration
+                # so the client never waits on it
+                logged = True
+                if logger.isEnabledFor(logging.INFO):
+                    asyncio.get_running_loop().call_soon(log_request, time.perf_counter_ns())
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:  # pragma: no cover - bubble up
+            status_code = 500
+            logger.exception("request_error", extra=extra)
+            raise
+        finally:
+            # responses that never completed (errors, disconnects) are logged inline
+            if not logged and logger.isEnabledFor(logging.INFO):
+                log_request(time.perf_counter_ns())
+
+
+app.add_middleware(RequestLoggingMiddleware)
+
+
+class ConflictRate:
+    """Time-decayed EWMA of the share of optimistic attempts that conflicted."""
+
+    __slots__ = ("value", "updated")
+
+    def __init__(self):
+        self.value = 0.0
+        self.updated = time.monotonic()
+
+    def current(self, now=None):
+        # decays with wall time so a row routed away from the optimistic path
+        # (and thus no longer reporting conflicts) is eventually probed again
+        if now is None:
+            now = time.monotonic()
+        return self.value * 0.5 ** ((now - self.updated) / CONFLICT_RATE_HALF_LIFE_S)
+
+    def observe(self, conflicted):
+        now = time.monotonic()
+        value = self.current(now)
+        self.value = value + CONFLICT_RATE_ALPHA * ((1.0 if conflicted else 0.0) - value)
+        self.updated = now
+
+
+# per-process hot-row tracking for the optimistic endpoint, keyed by product id
+_conflict_rate: Dict[int, ConflictRate] = {}
+
+
+def record_optimistic_attempt(product_id, conflicted):
+    rate = _conflict_rate.get(product_id)
+    if rate is None:
+        if not conflicted:
+            return
+        rate = _conflict_rate[product_id] = ConflictRate()
+    rate.observe(conflicted)
 
 
 class OrderRequest(BaseModel):
@@ -87,7 +250,21 @@ class OrderRequest(BaseModel):
 @app.on_event("startup")
 async def startup():
     global db_pool
-    db_pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=10)
+    start_log_listener()
+    db_pool = await asyncpg.create_pool(
+        DATABASE_URL,
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        max_inactive_connection_lifetime=300,
+        # asyncpg prepares each distinct SQL text once per connection and reuses
+        # it from this cache, so the SQL_* constants only pay parse/plan once
+        statement_cache_size=1024,
+        # order statements run as single autocommit statements, so pin their
+        # isolation here as a startup parameter (it survives the pool's RESET ALL
+        # on release); the version check already serializes optimistic writers,
+        # so SSI would only add overhead
+        server_settings={"default_transaction_isolation": "read committed"},
+    )
 
 
 @app.on_event("shutdown")
@@ -95,6 +272,7 @@ async def shutdown():
     global db_pool
     if db_pool:
         await db_pool.close()
+    stop_log_listener()
 
 
 @app.get("/health")
@@ -107,145 +285,129 @@ async def reset_products():
     async with db_pool.acquire() as conn:
         async with conn.transaction():
             # Reset to known initial values
-            await timed_execute(conn, "UPDATE products SET stock = CASE WHEN name = 'Super Widget' THEN 100 WHEN name = 'Mega Gadget' THEN 50 ELSE stock END, version = 1;")
+            await timed_execute(conn, SQL_RESET_PRODUCTS)
+    _product_cache.clear()
     logger.info("products_reset", extra={})
     return {"message": "Product inventory reset successfully."}
 
 
 @app.get("/api/products/{product_id}")
 async def get_product(product_id: int):
-    async with db_pool.acquire() as conn:
-        row = await timed_fetchrow(conn, "SELECT id, name, stock, version FROM products WHERE id = $1", product_id)
-        if not row:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return dict(row)
+    # the cache holds the encoded body, so hits skip serialization entirely
+    body = _product_cache.get(product_id)
+    if body is None:
+        async with db_pool.acquire() as conn:
+            row = await timed_fetchrow(conn, SQL_GET_PRODUCT, product_id)
+            if not row:
+                raise HTTPException(status_code=404, detail="Product not found")
+        # positional access follows the column order of SQL_GET_PRODUCT
+        body = orjson.dumps({"id": row[0], "name": row[1], "stock": row[2], "version": row[3]})
+        _product_cache[product_id] = body
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/api/orders/pessimistic")
 async def create_order_pessimistic(req: OrderRequest):
     async with db_pool.acquire() as conn:
         try:
-            async with conn.transaction():
-                # set local lock timeout
-                await conn.execute(f"SET LOCAL lock_timeout = '{PESSIMISTIC_LOCK_TIMEOUT_MS}ms'")
-                # acquire row lock
+            # acquire row lock
+            if logger.isEnabledFor(logging.INFO):
                 logger.info("pessimistic_lock_acquire_attempt", extra={"productId": req.productId, "userId": req.userId})
-                row = await timed_fetchrow(conn, "SELECT id, stock FROM products WHERE id = $1 FOR UPDATE", req.productId)
-                if not row:
-                    raise HTTPException(status_code=404, detail="Product not found")
-                if row["stock"] < req.quantity:
-                    # create failed order
-                    await conn.execute(
-                        "INSERT INTO orders (product_id, quantity_ordered, user_id, status) VALUES ($1,$2,$3,$4)",
-                        req.productId,
-                        req.quantity,
-                        req.userId,
-                        "FAILED_OUT_OF_STOCK",
-                    )
-                    logger.info("pessimistic_insufficient_stock", extra={"productId": req.productId, "stock": row["stock"], "requested": req.quantity, "userId": req.userId})
-                    raise HTTPException(status_code=400, detail="Insufficient stock")
-
-                # update stock and insert order
-                await timed_execute(conn, "UPDATE products SET stock = stock - $1 WHERE id = $2", req.quantity, req.productId)
-                res = await timed_fetchrow(
-                    conn,
-                    "INSERT INTO orders (product_id, quantity_ordered, user_id, status) VALUES ($1,$2,$3,$4) RETURNING id, status, created_at",
-                    req.productId,
-                    req.quantity,
-                    req.userId,
-                    "SUCCESS",
-                )
-                logger.info("pessimistic_order_success", extra={"orderId": res["id"], "productId": req.productId, "quantity": req.quantity, "userId": req.userId})
-                return {"orderId": res["id"], "status": res["status"]}
-        except asyncpg.exceptions.QueryCanceledError:
+            row = await timed_fetchrow(conn, SQL_PLACE_ORDER, req.productId, req.quantity, req.userId, PESSIMISTIC_LOCK_TIMEOUT_MS)
+        except (asyncpg.exceptions.LockNotAvailableError, asyncpg.exceptions.QueryCanceledError):
             # lock timeout
             logger.warning("pessimistic_lock_timeout", extra={"productId": req.productId, "userId": req.userId})
             raise HTTPException(status_code=409, detail="Lock timeout / conflict")
+    if not row:
+        raise HTTPException(status_code=404, detail="Product not found")
+    if row["order_status"] != "SUCCESS":
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("pessimistic_insufficient_stock", extra={"productId": req.productId, "stock": row["available"], "requested": req.quantity, "userId": req.userId})
+        raise HTTPException(status_code=400, detail="Insufficient stock")
+
+    _product_cache.pop(req.productId, None)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("pessimistic_order_success", extra={"orderId": row["order_id"], "productId": req.productId, "quantity": req.quantity, "userId": req.userId})
+    return {"orderId": row["order_id"], "status": row["order_status"]}
 
 
 @app.post("/api/orders/optimistic")
 async def create_order_optimistic(req: OrderRequest):
+    rate = _conflict_rate.get(req.productId)
+    if rate is not None:
+        current = rate.current()
+        if current > OPTIMISTIC_HOT_ROW_THRESHOLD:
+            # hot row: optimistic retries would mostly thrash, so queue on the row lock instead
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("optimistic_routed_pessimistic", extra={"productId": req.productId, "conflictRate": round(current, 3), "userId": req.userId})
+            return await create_order_pessimistic(req)
+
     attempt = 0
-    async with db_pool.acquire() as conn:
-        while attempt < OPTIMISTIC_MAX_RETRIES:
-            attempt += 1
+    while attempt < OPTIMISTIC_MAX_RETRIES:
+        attempt += 1
+        if logger.isEnabledFor(logging.INFO):
             logger.info("optimistic_attempt", extra={"attempt": attempt, "productId": req.productId, "userId": req.userId})
-            async with conn.transaction():
-                row = await timed_fetchrow(conn, "SELECT id, stock, version FROM products WHERE id = $1", req.productId)
-                if not row:
-                    raise HTTPException(status_code=404, detail="Product not found")
-                if row["stock"] < req.quantity:
-                    await conn.execute(
-                        "INSERT INTO orders (product_id, quantity_ordered, user_id, status) VALUES ($1,$2,$3,$4)",
-                        req.productId,
-                        req.quantity,
-                        req.userId,
-                        "FAILED_OUT_OF_STOCK",
-                    )
-                    logger.info("optimistic_insufficient_stock", extra={"productId": req.productId, "stock": row["stock"], "requested": req.quantity, "userId": req.userId})
-                    raise HTTPException(status_code=400, detail="Insufficient stock")
-
-                # attempt optimistic update
-                result = await timed_execute(
-                    conn,
-                    "UPDATE products SET stock = stock - $1, version = version + 1 WHERE id = $2 AND version = $3 AND stock >= $1",
-                    req.quantity,
-                    req.productId,
-                    row["version"],
-                )
-                # asyncpg returns command tag like 'UPDATE 1' or 'UPDATE 0'
-                updated = int(result.split()[1]) if len(result.split()) > 1 else 0
-                if updated == 1:
-                    r = await timed_fetchrow(
-                        conn,
-                        "INSERT INTO orders (product_id, quantity_ordered, user_id, status) VALUES ($1,$2,$3,$4) RETURNING id, status, created_at",
-                        req.productId,
-                        req.quantity,
-                        req.userId,
-                        "SUCCESS",
-                    )
-                    logger.info("optimistic_order_success", extra={"orderId": r["id"], "productId": req.productId, "quantity": req.quantity, "userId": req.userId, "attempt": attempt})
-                    return {"orderId": r["id"], "status": r["status"]}
-                else:
-                    # conflict; retry after backoff
-                    backoff_ms = OPTIMISTIC_BASE_BACKOFF_MS * (2 ** (attempt - 1))
-                    logger.info("optimistic_conflict_retry", extra={"productId": req.productId, "attempt": attempt, "backoff_ms": backoff_ms, "userId": req.userId})
-                    await asyncio.sleep(backoff_ms / 1000.0)
-                    continue
-
-        # If we reach here, retries exhausted
-        async with conn.transaction():
-            await timed_execute(
-                conn,
-                "INSERT INTO orders (product_id, quantity_ordered, user_id, status) VALUES ($1,$2,$3,$4)",
-                req.productId,
-                req.quantity,
-                req.userId,
-                "FAILED_CONFLICT",
-            )
-        logger.warning("optimistic_conflict_exhausted", extra={"productId": req.productId, "attempts": attempt, "userId": req.userId})
-        raise HTTPException(status_code=409, detail="Conflict after retries")
+        # acquire per attempt so the connection goes back to the pool during backoff
+        async with db_pool.acquire() as conn:
+            row = await timed_fetchrow(conn, SQL_OPTIMISTIC_ORDER, req.quantity, req.productId, req.userId)
+        if not row:
+            raise HTTPException(status_code=404, detail="Product not found")
+
+        if row["order_id"] is not None:
+            _product_cache.pop(req.productId, None)
+            record_optimistic_attempt(req.productId, False)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("optimistic_order_success", extra={"orderId": row["order_id"], "productId": req.productId, "quantity": req.quantity, "userId": req.userId, "attempt": attempt})
+            return {"orderId": row["order_id"], "status": row["order_status"]}
+        if row["failed_order_id"] is not None:
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("optimistic_insufficient_stock", extra={"productId": req.productId, "stock": row["stock"], "requested": req.quantity, "userId": req.userId})
+            raise HTTPException(status_code=400, detail="Insufficient stock")
+        record_optimistic_attempt(req.productId, True)
+        if attempt >= OPTIMISTIC_MAX_RETRIES:
+            break
+        # conflict; retry after capped exponential backoff with full jitter so
+        # colliding clients don't wake up in lockstep
+        cap = min(OPTIMISTIC_MAX_BACKOFF_MS, OPTIMISTIC_BASE_BACKOFF_MS * (2 ** (attempt - 1)))
+        backoff_ms = int(random.uniform(0, cap))
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("optimistic_conflict_retry", extra={"productId": req.productId, "attempt": attempt, "backoff_ms": backoff_ms, "userId": req.userId})
+        await asyncio.sleep(backoff_ms / 1000.0)
+
+    # If we reach here, retries exhausted
+    async with db_pool.acquire() as conn:
+        await timed_execute(conn, SQL_INSERT_CONFLICT_ORDER, req.productId, req.quantity, req.userId)
+    logger.warning("optimistic_conflict_exhausted", extra={"productId": req.productId, "attempts": attempt, "userId": req.userId})
+    raise HTTPException(status_code=409, detail="Conflict after retries")
 
 
 @app.get("/api/orders/stats")
 async def orders_stats():
     async with db_pool.acquire() as conn:
-        total = await timed_fetchval(conn, "SELECT COUNT(*) FROM orders")
-        success = await timed_fetchval(conn, "SELECT COUNT(*) FROM orders WHERE status = 'SUCCESS'")
-        failed_oos = await timed_fetchval(conn, "SELECT COUNT(*) FROM orders WHERE status = 'FAILED_OUT_OF_STOCK'")
-        failed_conflict = await timed_fetchval(conn, "SELECT COUNT(*) FROM orders WHERE status = 'FAILED_CONFLICT'")
+        # counters are maintained by the orders_status_count trigger (seeds/init.sql)
+        rows = await timed_fetch(conn, SQL_ORDER_STATUS_COUNTS)
+        counts = {r["status"]: int(r["n"]) for r in rows}
         return {
-            "totalOrders": int(total),
-            "successfulOrders": int(success),
-            "failedOutOfStock": int(failed_oos),
-            "failedConflict": int(failed_conflict),
+            "totalOrders": sum(counts.values()),
+            "successfulOrders": counts.get("SUCCESS", 0),
+            "failedOutOfStock": counts.get("FAILED_OUT_OF_STOCK", 0),
+            "failedConflict": counts.get("FAILED_CONFLICT", 0),
         }
 
 
 @app.get("/api/orders/{order_id:int}")
 async def get_order(order_id: int):
     async with db_pool.acquire() as conn:
-        row = await timed_fetchrow(conn, "SELECT id, product_id, quantity_ordered, user_id, status, created_at FROM orders WHERE id = $1", order_id)
+        row = await timed_fetchrow(conn, SQL_GET_ORDER, order_id)
         if not row:
             raise HTTPException(status_code=404, detail="Order not found")
-        return dict(row)
\ No newline at end of file
+    # returning a Response skips FastAPI's jsonable_encoder pass; positional
+    # access follows the column order of SQL_GET_ORDER
+    return ORJSONResponse({
+        "id": row[0],
+        "product_id": row[1],
+        "quantity_ordered": row[2],
+        "user_id": row[3],
+        "status": row[4],
+        "created_at": row[5],
+    })
@@ -16,6 +16,66 @@ CREATE TABLE IF NOT EXISTS orders (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Per-product, per-status order counters, maintained by trigger so
+-- /api/orders/stats sums a few rows instead of scanning orders. Keying by
+-- product means an order only ever locks its own product's counter row, so
+-- orders for different products never serialize on a shared counter
+CREATE TABLE IF NOT EXISTS order_status_counts (
+    product_id INTEGER NOT NULL,
+    status VARCHAR(50) NOT NULL,
+    n BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, status)
+);
+
+INSERT INTO order_status_counts (product_id, status, n)
+SELECT COALESCE(product_id, 0), status, COUNT(*) FROM orders GROUP BY 1, 2
+ON CONFLICT (product_id, status) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_order_status_count() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO order_status_counts (product_id, status, n)
+    VALUES (COALESCE(NEW.product_id, 0), NEW.status, 1)
+    ON CONFLICT (product_id, status) DO UPDATE SET n = order_status_counts.n + 1;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER orders_status_count
+AFTER INSERT ON orders
+FOR EACH ROW EXECUTE FUNCTION bump_order_status_count();
+
+-- Pessimistic order placement in a single round-trip: lock the product row
+-- (waiting at most lock_timeout_ms), then either record a failed order or
+-- decrement stock and record a successful one. Returns no row if the product
+-- does not exist.
+CREATE OR REPLACE FUNCTION place_order(pid INTEGER, qty INTEGER, uid VARCHAR, lock_timeout_ms INTEGER)
+RETURNS TABLE (order_id INTEGER, order_status VARCHAR, available INTEGER) AS $$
+BEGIN
+    -- transaction-local, so the timeout only bounds this order's row lock wait
+    PERFORM set_config('lock_timeout', lock_timeout_ms || 'ms', true);
+    -- lock rows in id order so multi-product orders can't deadlock on lock
+    -- order (IN/ANY alone doesn't fix the order); today the id set is ARRAY[pid]
+    PERFORM 1 FROM products p WHERE p.id = ANY(ARRAY[pid]) ORDER BY p.id FOR UPDATE;
+    SELECT p.stock INTO available FROM products p WHERE p.id = pid;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+    IF available < qty THEN
+        -- audit row only; don't wait for the WAL flush when committing it
+        PERFORM set_config('synchronous_commit', 'off', true);
+        INSERT INTO orders (product_id, quantity_ordered, user_id, status)
+        VALUES (pid, qty, uid, 'FAILED_OUT_OF_STOCK')
+        RETURNING id, status INTO order_id, order_status;
+    ELSE
+        UPDATE products SET stock = stock - qty WHERE id = pid;
+        INSERT INTO orders (product_id, quantity_ordered, user_id, status)
+        VALUES (pid, qty, uid, 'SUCCESS')
+        RETURNING id, status INTO order_id, order_status;
+    END IF;
+    RETURN NEXT;
+END
+$$ LANGUAGE plpgsql;
+
 -- Insert initial product data (only if not exists)
 DO $$
 BEGIN
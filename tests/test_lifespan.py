@@ -0,0 +1,28 @@
+"""The app must survive repeated startup/shutdown cycles (no database needed)."""
+import pytest
+
+pytest.importorskip("asyncpg")
+pytest.importorskip("httpx")
+testclient = pytest.importorskip("fastapi.testclient")
+
+from app import main  # noqa: E402
+
+
+class _FakePool:
+    async def close(self):
+        pass
+
+
+async def _fake_create_pool(*args, **kwargs):
+    return _FakePool()
+
+
+def test_two_lifespan_cycles_keep_logging(monkeypatch):
+    monkeypatch.setattr(main.asyncpg, "create_pool", _fake_create_pool)
+    for _ in range(2):
+        with testclient.TestClient(main.app) as client:
+            assert client.get("/health").status_code == 200
+        # shutdown flushed every record logged during this cycle
+        assert main.log_queue.empty()
+    # a second stop is a no-op rather than an error
+    main.stop_log_listener()